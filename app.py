@@ -1,112 +1,270 @@
 # 📚 AI Book Reader + Summarizer with TOC Navigation
 
 import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import logging
 import os
-import uuid
+import pickle
+import struct
+import tempfile
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import streamlit as st
 import pymupdf
 import edge_tts
 from google import genai
 from google.genai import types
-import wave
 from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # --- CONFIG ---
 CHUNK_CHAR_LIMIT = 3000
 CACHE_DIR = "./cache"
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, "tts")
+VOICE_SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", "voice-samples")
+FALLBACK_VOICE = "en-US-GuyNeural"
+AVAILABLE_VOICES = ["Zephyr", "Puck", "Leda", "Laomedeia", "Alnilam", "Sadaltager"]
+SUMMARY_CACHE_DIR = os.path.join(CACHE_DIR, "summaries")
+SUMMARY_CACHE_MAX_ENTRIES = 500
+SUMMARY_MEMORY_TTL = 7 * 24 * 3600
+# Part of the key of every summary cache tier, so switching models starts cold
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+# Bump to invalidate every cached summary after changing the prompt
+SUMMARY_PROMPT_VERSION = "v3"
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_PATH = os.path.join(CACHE_DIR, "summaries.semantic.npz")
 
 # --- GLOBAL STATE ---
-st.session_state.setdefault("toc", [])
+st.session_state.setdefault("toc", None)
 st.session_state.setdefault("current_section", None)
 
-# --- CLASS ---
-class TOCNode:
-    def __init__(self, level, title, page):
-        self.level = level
-        self.title = title
-        self.page = page
-        self.children = []
-
-
 # --- FUNCTIONS ---
 def build_tree(flat_toc):
-    root = TOCNode(0, "root", None)
-    stack = [root]
-
-    for level, title, page in flat_toc:
-        node = TOCNode(level, title, page)
+    """Pack the flat TOC into parallel arrays linked by first_child / next_sibling indices.
+
+    Index 0 is the first top-level entry; -1 marks a missing child or sibling.
+    """
+    tree = {
+        "level": array("b"),
+        "title": [],
+        "page": array("i"),
+        "first_child": array("i"),
+        "next_sibling": array("i"),
+    }
+    stack = []
+    last_child = {-1: -1}  # parent index -> index of its most recent child, -1 is the root
+
+    for idx, (level, title, page) in enumerate(flat_toc):
+        tree["level"].append(level)
+        tree["title"].append(title)
+        tree["page"].append(page)
+        tree["first_child"].append(-1)
+        tree["next_sibling"].append(-1)
 
         # Maintain hierarchy using stack
-        while stack and stack[-1].level >= level:
+        while stack and tree["level"][stack[-1]] >= level:
             stack.pop()
-        stack[-1].children.append(node)
-        stack.append(node)
-
-    return root.children
-
-
-def render_node(node, pdf_path):
-    """Render the tree recursively in sidebar"""
-    if node.children:
-        with st.sidebar.expander(f"**{node.title}**"):
-            for child in node.children:
-                render_node(node=child, pdf_path=pdf_path)
-    else:
-        if st.button(f"{node.title} (Pg {node.page})", icon=":material/bookmark:"):
-            text = extract_text_from_page(pdf_path, node.page - 1)
-            summary = summarize_text(text)
-            st.session_state["current_section"] = (node.title, node.page, text, summary)
-
-
-def extract_pdf_toc(pdf_path):
-    doc = pymupdf.open(pdf_path)
+        parent = stack[-1] if stack else -1
+        prev = last_child.get(parent, -1)
+        if prev != -1:
+            tree["next_sibling"][prev] = idx
+        elif parent != -1:
+            tree["first_child"][parent] = idx
+        last_child[parent] = idx
+        stack.append(idx)
+
+    return tree
+
+
+def iter_children(tree, idx):
+    child = tree["first_child"][idx]
+    while child != -1:
+        yield child
+        child = tree["next_sibling"][child]
+
+
+def render_node(tree, idx, pdf_path):
+    """Render the subtree rooted at idx iteratively in sidebar"""
+    # Each open expander gets its own ExitStack so it can be closed individually
+    # once the walk climbs back above its depth
+    scopes = []
+    stack = [(idx, 0)]
+    try:
+        while stack:
+            idx, depth = stack.pop()
+            while len(scopes) > depth:
+                scopes.pop().close()
+
+            title, page = tree["title"][idx], tree["page"][idx]
+            if tree["first_child"][idx] != -1:
+                scope = contextlib.ExitStack()
+                scope.enter_context(st.sidebar.expander(f"**{title}**"))
+                scopes.append(scope)
+                stack.extend((child, depth + 1) for child in reversed(list(iter_children(tree, idx))))
+            elif st.button(f"{title} (Pg {page})", icon=":material/bookmark:", key=f"toc-{idx}"):
+                text = extract_text_from_page(pdf_path, page - 1)
+                summary = summarize_text(text)
+                st.session_state["current_section"] = (title, page, text, summary)
+                prefetch_section(tree, next_leaf(tree, idx), pdf_path)
+    finally:
+        while scopes:
+            scopes.pop().close()
+
+
+def next_leaf(tree, idx):
+    """Return the leaf that follows idx in reading order, or -1 if idx is the last one"""
+    # The arrays are stored in pre-order, so the next leaf is simply the next childless index
+    for candidate in range(idx + 1, len(tree["title"])):
+        if tree["first_child"][candidate] == -1:
+            return candidate
+    return -1
+
+
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+def _log_prefetch_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Prefetch failed", exc_info=future.exception())
+
+
+def prefetch_section(tree, idx, pdf_path):
+    """Warm the on-disk caches for a section in the background while the user reads"""
+    if idx == -1:
+        return
+    # Page text comes from the session's open document, so extract it on this thread
+    text = extract_text_from_page(pdf_path, tree["page"][idx] - 1)
+    executor = get_prefetch_executor()
+    if not os.path.exists(_summary_cache_path(text)):
+        executor.submit(summarize_text, text).add_done_callback(_log_prefetch_failure)
+
+    # Only the first chunk is narrated ahead of time: it hides the wait for the first
+    # audio without spending TTS quota on whole sections the user may skip
+    chunks = chunk_text(text)
+    voice = st.session_state.get("voice_selector", AVAILABLE_VOICES[0])
+    if chunks:
+        filename = get_cache_filename(chunks[0], voice)
+        if not os.path.exists(filename):
+            # Shared by filename, so clicking Read This Aloud while this runs joins it
+            # instead of calling Gemini a second time
+            asyncio.run_coroutine_threadsafe(
+                read_aloud_shared(text=chunks[0], voice=voice, filename=filename, inflight=get_tts_inflight()),
+                get_tts_loop(),
+            ).add_done_callback(_log_prefetch_failure)
+
+
+def _get_doc(pdf_path):
+    """Open the PDF once per session and reuse the parsed document on later calls"""
+    doc = st.session_state.get("_pdf_doc")
+    if doc is None or st.session_state.get("_pdf_path") != pdf_path:
+        if doc is not None:
+            doc.close()
+        # A fresh upload leaves its bytes behind so the first parse skips the disk copy
+        pdf_bytes = st.session_state.pop("_pdf_bytes", None)
+        if pdf_bytes is not None and st.session_state.get("_pdf_path") == pdf_path:
+            doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+        else:
+            doc = pymupdf.open(pdf_path)
+        st.session_state["_pdf_doc"] = doc
+        st.session_state["_pdf_path"] = pdf_path
+    return doc
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _extract_pdf_toc_cached(pdf_path, mtime):
+    doc = _get_doc(pdf_path)
     toc = doc.get_toc()
     toc_tree = build_tree(toc)
     return toc_tree
 
 
-def extract_text_from_page(pdf_path, page_number):
-    doc = pymupdf.open(pdf_path)
+def extract_pdf_toc(pdf_path):
+    return _extract_pdf_toc_cached(pdf_path, os.path.getmtime(pdf_path))
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _extract_text_cached(pdf_path, mtime, page_number):
+    # mtime is only part of the cache key, so replacing the file invalidates its pages
+    doc = _get_doc(pdf_path)
     if page_number < len(doc):
-        return doc[page_number].get_text()
+        blocks = doc[page_number].get_text("blocks")
+        # Keep text blocks only (type 0); image-only and blank pages come back empty
+        return "\n\n".join(block[4].strip() for block in blocks if block[6] == 0 and block[4].strip())
     return "Page not found."
 
 
+def extract_text_from_page(pdf_path, page_number):
+    return _extract_text_cached(pdf_path, os.path.getmtime(pdf_path), page_number)
+
+
 def chunk_text(text, limit=CHUNK_CHAR_LIMIT):
     return [text[i:i+limit] for i in range(0, len(text), limit)]
 
 
 def get_voice_samples(voice):
-    return os.path.join("utils/voice-samples", f"{voice}-intro.wav")
+    return os.path.join(VOICE_SAMPLES_DIR, f"{voice.lower()}-intro.wav")
+
+
+@st.cache_resource(show_spinner=False)
+def load_voice_samples():
+    """Read every voice sample once per server process instead of on every rerun"""
+    samples = {}
+    for voice in AVAILABLE_VOICES:
+        with open(get_voice_samples(voice), 'rb') as audio_file:
+            samples[voice] = audio_file.read()
+    return samples
 
 
 def get_cache_filename(text, voice):
-    unique_id = uuid.uuid5(uuid.NAMESPACE_DNS, text + voice)
-    return os.path.join(CACHE_DIR, f"{unique_id}_{voice}.wav")
+    digest = hashlib.sha256(voice.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return os.path.join(TTS_CACHE_DIR, f"{digest.hexdigest()[:32]}.wav")
+
+
+def _wav_header(n_bytes, channels=1, rate=24000, sample_width=2):
+    """Canonical 44-byte PCM WAV header for n_bytes of audio data"""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + n_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, rate, rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b"data", n_bytes,
+    )
 
 
 def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
-    with wave.open(filename, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(sample_width)
-        wf.setframerate(rate)
-        wf.writeframes(pcm)
+    """Write pcm to filename as WAV and return the WAV bytes"""
+    data = _wav_header(len(pcm), channels, rate, sample_width) + pcm
+    with open(filename, "wb") as f:
+        f.write(data)
+    return data
 
 
 async def read_aloud(text, voice, filename):
-    filename = get_cache_filename(text, voice)
+    """Return narration audio bytes for text, synthesizing and caching them on a miss"""
     if not os.path.exists(filename):
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
         try:
             content = f"""
             Read in a bold, confident and a coorporate professional tone:
 
             {text} 
             """
+            # Async client so chunks gathered together actually overlap on the network
             client = genai.Client()
-            response = client.models.generate_content(
+            response = await client.aio.models.generate_content(
                 model="gemini-2.5-pro-preview-tts",
                 contents=content,
                 config=types.GenerateContentConfig(
@@ -120,39 +278,300 @@ async def read_aloud(text, voice, filename):
                     ),
                 )
             )
-            data = response.candidates[0].content.parts[0].inline_data.data
-            wave_file(filename, data)
-        except Exception as e:
-            st.info(
-                body="""
-                Seems like your GOOGLE_API_KEY has expired or the rate limit exceeded. 
-                Wait for the limit to reset or try creating a new api key to listen to google gemini voices.
-
-                For now defaulting to edge-tts voice.
-                """,
-                icon="ℹ️"
-            )
-            filename = get_cache_filename(text, "en-US-GuyNeural")
-            communicate = edge_tts.Communicate(text, voice="en-US-GuyNeural")
-            await communicate.save(filename)
+            pcm = response.candidates[0].content.parts[0].inline_data.data
+            return wave_file(filename, pcm)
+        except Exception:
+            # Runs on the background TTS loop, where st.* calls cannot render; the caller
+            # tells edge-tts audio apart with is_fallback_audio and shows the notice
+            filename = get_cache_filename(text, FALLBACK_VOICE)
+            if os.path.exists(filename):
+                with open(filename, 'rb') as audio_file:
+                    return audio_file.read()
+            communicate = edge_tts.Communicate(text, voice=FALLBACK_VOICE)
+            buffer = io.BytesIO()
+            async for message in communicate.stream():
+                if message["type"] == "audio":
+                    buffer.write(message["data"])
+            data = buffer.getvalue()
+            with open(filename, "wb") as f:
+                f.write(data)
+            return data
+
+    with open(filename, 'rb') as audio_file:
+        return audio_file.read()
+
+
+def is_fallback_audio(audio):
+    # Gemini narration is cached as WAV, the edge-tts fallback as MP3
+    return not audio.startswith(b"RIFF")
+
+
+@st.cache_resource(show_spinner=False)
+def get_tts_loop():
+    """One event loop on a daemon thread, shared by every TTS call for the life of the server"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="tts-loop", daemon=True).start()
+    return loop
+
+
+@st.cache_resource(show_spinner=False)
+def get_tts_inflight():
+    """Cache filename -> running synthesis task; only touched from the TTS loop thread"""
+    return {}
+
+
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_tts_loop()).result()
+
+
+async def read_aloud_shared(text, voice, filename, inflight):
+    """read_aloud, but joins a synthesis of the same file that is already running"""
+    task = inflight.get(filename)
+    if task is None:
+        task = asyncio.ensure_future(read_aloud(text=text, voice=voice, filename=filename))
+        inflight[filename] = task
+        task.add_done_callback(lambda _: inflight.pop(filename, None))
+    # Shielded so one caller giving up does not cancel the work for the others
+    return await asyncio.shield(task)
+
+
+async def read_aloud_chunks(chunks, voice, inflight):
+    """Synthesize all chunks concurrently, returning audio bytes (or the raised exception) in order"""
+    tasks = [
+        read_aloud_shared(text=chunk, voice=voice, filename=get_cache_filename(chunk, voice), inflight=inflight)
+        for chunk in chunks
+    ]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    """One client per server process so its connection pool is reused across calls"""
+    return OpenAI()
+
+
+def _atomic_write(path, data):
+    """Write bytes via a temp file and rename, so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _summary_cache_path(text):
+    key = f"{SUMMARY_MODEL}|{SUMMARY_PROMPT_VERSION}|{text}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(SUMMARY_CACHE_DIR, f"{digest}.txt")
+
+
+def _trim_summary_cache(max_entries=SUMMARY_CACHE_MAX_ENTRIES):
+    """Delete the least recently used summaries once the cache grows past max_entries"""
+    entries = [entry for entry in os.scandir(SUMMARY_CACHE_DIR) if entry.name.endswith(".txt")]
+    if len(entries) <= max_entries:
+        return
+
+    # Another sweep may delete files between scandir and stat; those are simply skipped
+    aged = []
+    for entry in entries:
+        try:
+            aged.append((entry.stat().st_mtime, entry.path))
+        except FileNotFoundError:
+            pass
+    aged.sort()
+    for _, path in aged[:len(aged) - max_entries]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 
-    audio_file = open(filename, 'rb')
-    st.audio(audio_file.read(), format='audio/wav')
+def _embed_text(text):
+    response = get_openai_client().embeddings.create(model=EMBEDDING_MODEL, input=text)
+    embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache():
+    """Process-wide lock plus the last parsed copy of the semantic cache file"""
+    return {"lock": threading.Lock(), "stat": None, "vectors": None, "entries": []}
+
+
+def _is_servable(entry):
+    return (
+        entry.get("model") == SUMMARY_MODEL
+        and entry.get("prompt_version") == SUMMARY_PROMPT_VERSION
+        and entry.get("embedding_model") == EMBEDDING_MODEL
+    )
+
+
+def _load_semantic_cache(state):
+    """Return (vectors, entries), re-reading the file only when it changed on disk.
+
+    Must be called with state["lock"] held.
+    """
+    try:
+        stat = os.stat(SEMANTIC_CACHE_PATH)
+    except FileNotFoundError:
+        return None, []
+    key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if state["stat"] != key:
+        try:
+            with np.load(SEMANTIC_CACHE_PATH) as data:
+                vectors = data["vectors"]
+                entries = json.loads(data["entries"].tobytes().decode("utf-8"))
+        except Exception:
+            logger.warning("Ignoring unreadable semantic cache %s", SEMANTIC_CACHE_PATH, exc_info=True)
+            vectors, entries = None, []
+        state.update(stat=key, vectors=vectors, entries=entries)
+    return state["vectors"], state["entries"]
+
+
+def _semantic_cache_lookup(embedding):
+    """Return the cached summary of the most similar stored text, if it is close enough"""
+    state = get_semantic_cache()
+    with state["lock"]:
+        vectors, entries = _load_semantic_cache(state)
+
+    if vectors is None or vectors.shape[1] != embedding.shape[0]:
+        return None
+    rows = [row for row, entry in enumerate(entries) if _is_servable(entry)]
+    if not rows:
+        return None
+    sims = vectors[rows] @ embedding
+    best = int(np.argmax(sims))
+    if sims[best] < SEMANTIC_CACHE_THRESHOLD:
+        return None
+    return entries[rows[best]]["summary"]
+
+
+def _semantic_cache_store(embedding, text, summary, max_entries=SUMMARY_CACHE_MAX_ENTRIES):
+    entry = {
+        "model": SUMMARY_MODEL,
+        "prompt_version": SUMMARY_PROMPT_VERSION,
+        "embedding_model": EMBEDDING_MODEL,
+        "hash": os.path.splitext(os.path.basename(_summary_cache_path(text)))[0],
+        "summary": summary,
+        "text_preview": text[:200],
+    }
+    state = get_semantic_cache()
+    with state["lock"]:
+        vectors, entries = _load_semantic_cache(state)
+
+        # Rows from another model, prompt version or embedding size can never be served
+        # again, and only the newest max_entries are kept, matching the exact-hash tier
+        keep = []
+        if vectors is not None and vectors.shape[1] == embedding.shape[0]:
+            keep = [row for row, stored in enumerate(entries) if _is_servable(stored)]
+            keep = keep[len(keep) - (max_entries - 1):] if len(keep) >= max_entries else keep
+        if keep:
+            vectors = np.vstack([vectors[keep], embedding[np.newaxis, :]])
+        else:
+            vectors = embedding[np.newaxis, :]
+        entries = [entries[row] for row in keep] + [entry]
+
+        # Vectors and entries live in one file replaced atomically, so rows can never
+        # drift from their entries and a crash mid-write leaves the previous file intact
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            vectors=vectors,
+            entries=np.frombuffer(json.dumps(entries).encode("utf-8"), dtype=np.uint8),
+        )
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _atomic_write(SEMANTIC_CACHE_PATH, buffer.getvalue())
+        stat = os.stat(SEMANTIC_CACHE_PATH)
+        state.update(stat=(stat.st_ino, stat.st_size, stat.st_mtime_ns), vectors=vectors, entries=entries)
+
+
+class SummaryTruncatedError(Exception):
+    """The completion stopped at max_tokens; carries the partial text so it is shown but never cached"""
+
+    def __init__(self, partial):
+        super().__init__("Summary was cut off at max_tokens")
+        self.partial = partial
+
+
+def _complete(prompt, max_tokens=400):
+    response = get_openai_client().chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        # Deterministic output keeps the summary caches sound
+        temperature=0,
+    )
+    choice = response.choices[0]
+    content = choice.message.content.strip()
+    if choice.finish_reason == "length":
+        raise SummaryTruncatedError(content)
+    return content
 
 
 def summarize_text(text):
+    try:
+        return _summarize_text_cached(text)
+    except SummaryTruncatedError as e:
+        # Shown as-is but kept out of every cache tier, so the next call tries again
+        return e.partial
+
+
+# In-process first tier; the on-disk and semantic caches below are the second tier
+@st.cache_data(show_spinner=False, max_entries=64, ttl=SUMMARY_MEMORY_TTL)
+def _summarize_text_cached(text):
+    if not text.strip():
+        return ""
+
+    cache_path = _summary_cache_path(text)
+    try:
+        # Touch on hit so the trim sweep evicts by recency, not by creation time
+        os.utime(cache_path)
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        # Not cached yet, or evicted by a concurrent trim sweep
+        pass
+
+    # Near-duplicate sections (front matter, repeated headers) share one summary. The
+    # semantic tier is only an optimization, so any failure in it falls through to a completion.
+    embedding, summary = None, None
+    try:
+        embedding = _embed_text(text)
+        summary = _semantic_cache_lookup(embedding)
+    except Exception:
+        logger.warning("Semantic summary cache lookup failed", exc_info=True)
+    if summary is not None:
+        # Promote the hit to the exact-hash tier so this text is never embedded again,
+        # which is also what prefetch_section checks before submitting work
+        os.makedirs(SUMMARY_CACHE_DIR, exist_ok=True)
+        _atomic_write(cache_path, summary.encode("utf-8"))
+        _trim_summary_cache()
+        return summary
+
     prompt = f"Summarize the following content by highlighting the key takeaways:\n\n{text}"
-    response = OpenAI().chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content.strip()
+    summary = _complete(prompt)
+
+    os.makedirs(SUMMARY_CACHE_DIR, exist_ok=True)
+    _atomic_write(cache_path, summary.encode("utf-8"))
+    _trim_summary_cache()
+    if embedding is not None:
+        try:
+            _semantic_cache_store(embedding, text, summary)
+        except Exception:
+            logger.warning("Semantic summary cache store failed", exc_info=True)
+    return summary
 
 
 def display_toc_navigation(toc, pdf_path):
     st.sidebar.title("🧾 Table of Contents")
-    for chapter in toc:
-        render_node(node=chapter, pdf_path=pdf_path)
+    chapter = 0 if toc["title"] else -1
+    while chapter != -1:
+        render_node(tree=toc, idx=chapter, pdf_path=pdf_path)
+        chapter = toc["next_sibling"][chapter]
 
 
 def display_current_section():
@@ -163,28 +582,38 @@ def display_current_section():
     st.divider()
 
     # Voice selection placed near Read Aloud button
-    available_voices = ["Zephyr", "Puck", "Leda", "Laomedeia", "Alnilam", "Sadaltager"]
-
     col1, col2 = st.columns(2, vertical_alignment="bottom")
     with col1: 
-        selected_voice = st.selectbox("🎙 Choose Narration Voice", available_voices, key="voice_selector")
+        selected_voice = st.selectbox("🎙 Choose Narration Voice", AVAILABLE_VOICES, key="voice_selector")
     with col2:
         with st.popover(label="🎙 Hear Voices", width="stretch"):
-            for voice in available_voices:
+            voice_samples = load_voice_samples()
+            for voice in AVAILABLE_VOICES:
                 col1, col2 = st.columns([2,3], vertical_alignment="center")
                 with col1:
                     st.markdown(f"**{voice}**")
                 with col2:
-                    filename = get_voice_samples(voice)
-                    audio_file = open(filename, 'rb')
-                    st.audio(audio_file.read(), format='audio/wav')
+                    st.audio(voice_samples[voice], format='audio/wav')
 
     with st.container(horizontal=True, horizontal_alignment="distribute"):
         if st.button("🔊 Read This Aloud"):
-            filename = get_cache_filename(title, selected_voice)
-            for chunk in chunk_text(text):
-                with st.spinner("Wait for it...", show_time=True):
-                    asyncio.run(read_aloud(text=chunk, voice=selected_voice, filename=filename))
+            with st.spinner("Wait for it...", show_time=True):
+                audios = run_async(read_aloud_chunks(chunk_text(text), selected_voice, get_tts_inflight()))
+            if any(not isinstance(audio, Exception) and is_fallback_audio(audio) for audio in audios):
+                st.info(
+                    body="""
+                    Seems like your GOOGLE_API_KEY has expired or the rate limit exceeded. 
+                    Wait for the limit to reset or try creating a new api key to listen to google gemini voices.
+
+                    For now defaulting to edge-tts voice.
+                    """,
+                    icon="ℹ️"
+                )
+            for audio in audios:
+                if isinstance(audio, Exception):
+                    st.error(f"Could not narrate this part: {audio}")
+                else:
+                    st.audio(audio, format='audio/mpeg' if is_fallback_audio(audio) else 'audio/wav')
 
     st.divider()
 
@@ -204,16 +633,42 @@ uploaded_pdf = st.file_uploader("Upload your Book (PDF)", type="pdf")
 
 if uploaded_pdf:
     st.success("Book uploaded successfully!")
-    filename = uploaded_pdf.name
-    filepath = os.path.join(CACHE_DIR, filename)
-
-    if not os.path.exists(CACHE_DIR):
+    # Hash once per upload rather than on every rerun; a new upload resets the reader
+    if st.session_state.get("_upload_id") != uploaded_pdf.file_id:
+        pdf_bytes = uploaded_pdf.getvalue()
+        pdf_hash = hashlib.md5(pdf_bytes).hexdigest()
+        st.session_state["_upload_id"] = uploaded_pdf.file_id
+        st.session_state["pdf_hash"] = pdf_hash
+        st.session_state["toc"] = None
+        st.session_state["current_section"] = None
+        # Keep the upload buffer for _get_doc to parse on first use, so known books with a
+        # pickled TOC are never parsed and the copy written to disk below is never read back
+        previous_doc = st.session_state.pop("_pdf_doc", None)
+        if previous_doc is not None:
+            previous_doc.close()
+        st.session_state["_pdf_bytes"] = pdf_bytes
+        st.session_state["_pdf_path"] = os.path.join(CACHE_DIR, f"{pdf_hash}.pdf")
+
+    # Content-addressed so the same book uploaded again (even renamed) is reused
+    pdf_hash = st.session_state["pdf_hash"]
+    filepath = os.path.join(CACHE_DIR, f"{pdf_hash}.pdf")
+    toc_path = os.path.join(CACHE_DIR, f"{pdf_hash}.toc.pkl")
+
+    if not os.path.exists(filepath):
         os.makedirs(CACHE_DIR, exist_ok=True)
-    with open(filepath, 'wb') as f:
-        f.write(uploaded_pdf.getbuffer())
+        _atomic_write(filepath, uploaded_pdf.getvalue())
 
-    if not st.session_state["toc"]:
-        st.session_state["toc"] = extract_pdf_toc(filepath)
+    if st.session_state["toc"] is None:
+        try:
+            with open(toc_path, "rb") as f:
+                st.session_state["toc"] = pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except (EOFError, pickle.UnpicklingError):
+            logger.warning("Rebuilding unreadable TOC cache %s", toc_path, exc_info=True)
+        if st.session_state["toc"] is None:
+            st.session_state["toc"] = extract_pdf_toc(filepath)
+            _atomic_write(toc_path, pickle.dumps(st.session_state["toc"]))
 
     display_toc_navigation(st.session_state["toc"], filepath)
 